@@ -9,18 +9,25 @@ Look in the submodules of orbitx.programs for different programs.
 import argparse
 import logging
 import sys
+import threading
 import time
 import warnings
 from pathlib import Path
+from typing import Optional
 
 import vpython
 
+from orbitx import common
 from orbitx import logs
 from orbitx import programs
 from orbitx.graphics import launcher
 
 log = logging.getLogger()
 
+# Used to check if generated protobuf definitions are out of date.
+PROTO_FILE = Path('orbitx', 'orbitx.proto')
+GENERATED_PROTO_FILE = Path('orbitx', 'orbitx_pb2.py')
+
 
 def log_git_info():
     """For ease in debugging, try to get some version information.
@@ -29,14 +36,12 @@ def log_git_info():
     sure they're on the latest version."""
     try:
         git_dir = Path('.git')
-        head_file = git_dir / 'HEAD'
-        with head_file.open() as f:
-            head_contents = f.readline().strip()
-            log.info(f'Contents of .git/HEAD: {head_contents}')
-        if head_contents.split()[0] == 'ref:':
-            hash_file = git_dir / head_contents.split()[1]
-            with hash_file.open() as f:
-                log.info(f'Current reference hash: {f.readline().strip()}')
+        head_contents = (git_dir / 'HEAD').read_text().strip()
+        log.info(f'Contents of .git/HEAD: {head_contents}')
+        head_parts = head_contents.split()
+        if head_parts[0] == 'ref:':
+            ref_hash = (git_dir / head_parts[1]).read_text().strip()
+            log.info(f'Current reference hash: {ref_hash}')
     except FileNotFoundError:
         return
 
@@ -99,7 +104,11 @@ def main():
     warnings.filterwarnings('ignore', category=ResourceWarning)
     warnings.filterwarnings('ignore', module='vpython|asyncio|autobahn|txaio')
 
-    log_git_info()
+    # Make sure main loops can keep a steady framerate.
+    common.enable_high_res_timer()
+
+    # This is nice-to-have information, don't wait for it to be read.
+    threading.Thread(target=log_git_info, name='git info', daemon=True).start()
 
     parser = argparse.ArgumentParser()
     parser.add_argument('-v', '--verbose', action='store_true', default=False,
@@ -108,7 +117,10 @@ def main():
     parser.add_argument('--flamegraph', action='store_true', default=False,
                         help='Generating profiling reports, for a flamegraph.')
     parser.add_argument('--profile', action='store_true', default=False,
-                        help='Profile and print simple stats at exit.')
+                        help='Profile with a sampling profiler, and write '
+                        'a flamegraph at exit. py-spy might need root to '
+                        'attach, otherwise run "py-spy record -- python '
+                        'orbitx.py ..." instead.')
 
     # Use the argument parsers that each program defines
     subparsers = parser.add_subparsers(help='Which OrbitX program to run',
@@ -149,14 +161,19 @@ def main():
         if isinstance(e, (AttributeError, ValueError)) or \
             hasattr(e, '__module__') and (
                 'grpc' in e.__module__ or 'google' in e.__module__):
-            proto_file = Path('orbitx', 'orbitx.proto')
-            generated_file = Path('orbitx', 'orbitx_pb2.py')
-            if not generated_file.is_file():
+            try:
+                generated_mtime: Optional[float] = \
+                    GENERATED_PROTO_FILE.stat().st_mtime
+            except FileNotFoundError:
+                generated_mtime = None
+
+            if generated_mtime is None:
                 log.warning('================================================')
-                log.warning(f'{proto_file} does not exist.')
-            elif proto_file.stat().st_mtime > generated_file.stat().st_mtime:
+                log.warning(f'{GENERATED_PROTO_FILE} does not exist.')
+            elif PROTO_FILE.stat().st_mtime > generated_mtime:
                 log.warning('================================================')
-                log.warning(f'{proto_file} is newer than {generated_file}.')
+                log.warning(
+                    f'{PROTO_FILE} is newer than {GENERATED_PROTO_FILE}.')
             else:
                 # We thought that generated protobuf definitions were out of
                 # date, but it doesn't actually look like that's the case.
@@ -167,7 +184,7 @@ def main():
             log.warning('copy-pasting the contents of the `build` target and')
             log.warning('running it in your shell.')
             log.warning('You\'ll have to do this every time you change')
-            log.warning(str(proto_file))
+            log.warning(str(PROTO_FILE))
             log.warning('================================================')
 
         # We don't exit by allowing the exception to be uncaught, because then
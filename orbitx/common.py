@@ -2,15 +2,20 @@
 """Common code and class interfaces."""
 
 import atexit
+import hashlib
 import logging
+import os
 import pytz
+import subprocess
 import sys
-from io import StringIO
+import threading
+import time
 from pathlib import Path
 from typing import NamedTuple, Optional
 
 import numpy
 import google.protobuf.json_format
+import google.protobuf.message
 import vpython
 
 from orbitx import orbitx_pb2 as protos
@@ -116,6 +121,7 @@ SRB_BURNTIME = 120  # 120s of burntime.
 
 # ---------- Other runtime constants ----------
 PERF_FILE = 'flamegraph-data.log'
+PROFILE_FILE = 'orbitx-profile.svg'
 
 if getattr(sys, 'frozen', False):
     # We're running from a PyInstaller exe, use the path of the exe
@@ -128,6 +134,73 @@ elif sys.path[0] == '':
 else:
     PROGRAM_PATH = Path(sys.path[0])
 
+# Parsed savefiles are cached here, see _read_savefile_cache. Setting this to
+# None disables caching.
+SAVEFILE_CACHE_DIR: Optional[Path] = PROGRAM_PATH / 'cache'
+
+
+class FrameTimer:
+    """Paces a main loop to run at a fixed framerate.
+
+    Unlike sleeping for 1/framerate every frame, time spent doing work in the
+    loop counts towards the frame. Frames are scheduled against fixed
+    deadlines, so a slow frame doesn't delay every frame after it.
+
+    Usage:
+        frame_timer = FrameTimer(common.FRAMERATE)
+        while True:
+            do_work()
+            frame_timer.wait()
+    """
+
+    def __init__(self, framerate: float):
+        self.framerate = framerate
+        self.period = 1.0 / framerate
+        self._next_deadline = time.monotonic() + self.period
+
+    def wait(self, wake_event: Optional[threading.Event] = None) -> None:
+        """Sleeps until the next frame is due.
+
+        If wake_event is given, this also returns as soon as wake_event is
+        set, e.g. when there's user input to handle. In that case the next
+        frame is still due at the same time as it was before."""
+        delay = self._next_deadline - time.monotonic()
+        if delay > 0:
+            if wake_event is None:
+                time.sleep(delay)
+            elif wake_event.wait(timeout=delay):
+                wake_event.clear()
+                return
+        elif delay < -self.period:
+            # We've fallen more than a frame behind. Don't try to catch up by
+            # running a burst of frames back-to-back, just start over.
+            self._next_deadline = time.monotonic()
+
+        if wake_event is not None:
+            # The frame we're about to run will handle whatever woke us up.
+            wake_event.clear()
+        self._next_deadline += self.period
+
+
+def enable_high_res_timer():
+    """Makes sleeps in FrameTimer wake up closer to their deadline.
+
+    By default, Windows only wakes up sleeping threads every ~15.6 ms, which
+    is about a whole frame of jitter at 60 FPS. This raises the resolution to
+    1 ms until OrbitX exits. Other platforms already have precise sleeps."""
+    if sys.platform != 'win32':
+        return
+
+    import ctypes
+    try:
+        winmm = ctypes.WinDLL('winmm')
+    except OSError:
+        logging.getLogger().warning('Could not raise Windows timer resolution')
+        return
+    TIMERR_NOERROR = 0
+    if winmm.timeBeginPeriod(1) == TIMERR_NOERROR:
+        atexit.register(winmm.timeEndPeriod, 1)
+
 
 def format_num(num: Optional[float], unit: str,
                *, decimals: Optional[int] = None) -> str:
@@ -142,6 +215,17 @@ def savefile(name: str) -> Path:
     return PROGRAM_PATH / 'data' / 'saves' / name
 
 
+def savefile_argument(name: str) -> Path:
+    """Use as an argparse type= for savefile arguments.
+
+    Absolute paths are kept as-is, other paths are relative to data/saves/.
+    This way, each program has a ready-to-load Path after parsing args."""
+    path = Path(name)
+    if path.is_absolute():
+        return path
+    return savefile(name)
+
+
 def load_savefile(file: Path) -> 'data_structures.PhysicsState':
     """Loads the physics state represented by the input file.
     If the input file is an OrbitX-style .json file, simply loads it.
@@ -165,10 +249,13 @@ def load_savefile(file: Path) -> 'data_structures.PhysicsState':
             logging.getLogger().warning(
                 f'{file} is not a .json file, trying to load it anyways.')
 
-        with open(file, 'r') as f:
-            data = f.read()
-        read_state = protos.PhysicalState()
-        google.protobuf.json_format.Parse(data, read_state)
+        read_state = _read_savefile_cache(file)
+        if read_state is None:
+            with open(file, 'r') as f:
+                data = f.read()
+            read_state = protos.PhysicalState()
+            google.protobuf.json_format.Parse(data, read_state)
+            _write_savefile_cache(file, read_state)
         physics_state = data_structures.PhysicsState(None, read_state)
 
     if physics_state.time_acc == 0:
@@ -182,6 +269,68 @@ def load_savefile(file: Path) -> 'data_structures.PhysicsState':
     return physics_state
 
 
+def _savefile_cache(file: Path) -> Optional[Path]:
+    """Where the parsed version of a .json savefile is cached.
+
+    Each savefile only has one cache, named by a hash of the savefile's
+    path. A stale cache is overwritten, see _savefile_cache_key.
+    Returns None if caching is disabled."""
+    if SAVEFILE_CACHE_DIR is None:
+        return None
+    path_hash = hashlib.sha256(str(file.resolve()).encode()).hexdigest()
+    return SAVEFILE_CACHE_DIR / f'{path_hash}.pb'
+
+
+def _savefile_cache_key(file: Path) -> bytes:
+    """A hash of everything that would change the parsed savefile.
+
+    This is the savefile's size and mtime, and also the protobuf schema, since
+    serialized protobufs are parsed by field number. Cache files start with
+    this key, and a cache with a different key is stale."""
+    stat = file.stat()
+    cache_key = hashlib.sha256()
+    cache_key.update(protos.DESCRIPTOR.serialized_pb)
+    cache_key.update(f'{stat.st_size}\0{stat.st_mtime_ns}'.encode())
+    return cache_key.digest()
+
+
+def _read_savefile_cache(file: Path) -> Optional[protos.PhysicalState]:
+    """Returns the cached parse of a savefile, if there is an up-to-date one.
+
+    Parsing a serialized protobuf is much faster than parsing JSON."""
+    try:
+        cache = _savefile_cache(file)
+        if cache is None or not cache.is_file():
+            return None
+        cache_key = _savefile_cache_key(file)
+        data = cache.read_bytes()
+        if not data.startswith(cache_key):
+            return None
+        cached_state = protos.PhysicalState()
+        cached_state.ParseFromString(data[len(cache_key):])
+        return cached_state
+    except (OSError, google.protobuf.message.DecodeError):
+        return None
+
+
+def _write_savefile_cache(file: Path, read_state: protos.PhysicalState):
+    """Caches a parsed savefile, see _read_savefile_cache."""
+    try:
+        cache = _savefile_cache(file)
+        if cache is None:
+            return
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so that nobody can read a partly
+        # written cache (which might still parse, just incorrectly).
+        partial_cache = cache.with_name(f'{cache.name}.{os.getpid()}.tmp')
+        partial_cache.write_bytes(
+            _savefile_cache_key(file) + read_state.SerializeToString())
+        os.replace(partial_cache, cache)
+    except OSError:
+        # Caching is only an optimization, this isn't a problem.
+        logging.getLogger().info(f'Could not cache savefile {file}')
+
+
 def write_savefile(state: 'data_structures.PhysicsState', file: Path):
     """Writes state to the specified savefile path (use common.savefile to get
     a savefile path in data/saves/). Returns a possibly-different path that it
@@ -213,29 +362,39 @@ def start_flamegraphing():
 
 
 def start_profiling():
-    # This will show the performance impact of each function.
+    # This will show the performance impact of each function, by running the
+    # py-spy sampling profiler in a separate process. Unlike an instrumenting
+    # profiler, this doesn't slow down every function call, so the main loop
+    # still runs at a representative speed. py-spy writes PROFILE_FILE when
+    # OrbitX exits. On Linux and macOS, py-spy might need root privileges to
+    # attach to another process.
     # If you want to see the performance impact of each _line_ in a function,
     # pip install line_profiler
     # and add @profile annotations to functions of interest, then run kernprof
     # as described in the line_profiler package.
-    import yappi
-    yappi.set_clock_type('cpu')
-    yappi.start()
-    atexit.register(_dump_profiling_stats)
-
-
-def _dump_profiling_stats():
-    import yappi
-    # To find out what functions have the biggest impact on performance,
-    # sort by 'tsub' or 'ttot'. Docs are here:
-    # https://github.com/sumerc/yappi/blob/master/doc/api.md#yfuncstat
-
-    # Only print the first bunch of lines of yappi output.
-    yappi.stop()
-    yappi_output = StringIO()
-    yappi.get_func_stats().sort('tsub').print_all(out=yappi_output)
-    for line in yappi_output.getvalue().split('\n')[0:30]:
-        print(line)
+    try:
+        profiler = subprocess.Popen([
+            'py-spy', 'record',
+            '--pid', str(os.getpid()),
+            '--output', PROFILE_FILE,
+            # Don't pause OrbitX every time py-spy takes a sample.
+            '--nonblocking'
+        ])
+    except FileNotFoundError:
+        logging.getLogger().warning(
+            'Could not find py-spy, pip install py-spy to profile.')
+        return
+
+    # If py-spy can't attach to us, e.g. because of ptrace restrictions, it
+    # exits right away. Give it a moment so we can tell the user.
+    time.sleep(0.5)
+    if profiler.poll() is not None:
+        logging.getLogger().warning(
+            f'py-spy exited with code {profiler.returncode}, not profiling. '
+            'Try running as root, or start OrbitX under py-spy with '
+            f'"py-spy record -o {PROFILE_FILE} -- python orbitx.py ...".')
+        return
+    logging.getLogger().info(f'Profiling, will write {PROFILE_FILE} at exit.')
 
 
 def remove_vpython_css():
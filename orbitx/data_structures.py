@@ -391,8 +391,16 @@ class PhysicsState:
         by doing:
         for entity in my_physics_state: print(entity.name)"""
         constructed_protobuf = protos.PhysicalState()
-        constructed_protobuf.CopyFrom(self._proto_state)
-        for entity_data, entity in zip(self, constructed_protobuf.entities):
+        self.copy_into_proto(constructed_protobuf)
+        return constructed_protobuf
+
+    def copy_into_proto(self, proto_state: protos.PhysicalState):
+        """Like as_proto, but overwrites an existing protos.PhysicalState.
+
+        Reusing the same protos.PhysicalState lets protobuf reuse the storage
+        of each entity, instead of allocating new messages each time."""
+        proto_state.CopyFrom(self._proto_state)
+        for entity_data, entity in zip(self, proto_state.entities):
             (
                 entity.x, entity.y, entity.vx, entity.vy,
                 entity.heading, entity.spin, entity.fuel,
@@ -405,8 +413,6 @@ class PhysicsState:
                 entity_data.broken
             )
 
-        return constructed_protobuf
-
     def __len__(self):
         """Implements `len(physics_state)`."""
         return self._n
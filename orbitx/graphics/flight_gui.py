@@ -96,6 +96,8 @@ class FlightGui:
             vpython.rate(100)
             self._scene.range = self._scene.range * 0.92
         self.recentre_camera(common.DEFAULT_CENTRE)
+
+        self._frame_timer = common.FrameTimer(common.FRAMERATE)
     # end of __init__
 
     @staticmethod
@@ -361,10 +363,14 @@ class FlightGui:
     def _orbits_checkbox_hook(self, selection: vpython.menu) -> None:
         self._orbit_projection.show(selection.checked)
 
-    @staticmethod
-    def rate(framerate: int) -> None:
-        """Alias for vpython.rate(framerate). Basically sleeps 1/framerate"""
-        vpython.rate(framerate)
+    def rate(self, framerate: int) -> None:
+        """Sleeps until the next frame is due, 1/framerate after the last one.
+
+        Unlike vpython.rate, time spent drawing and simulating counts towards
+        the frame, so the main loop doesn't drift."""
+        if self._frame_timer.framerate != framerate:
+            self._frame_timer = common.FrameTimer(framerate)
+        self._frame_timer.wait()
 
     def pause(self, pause: bool):
         """Sets whether the FlightGui considers itself paused.
@@ -2,10 +2,11 @@
 
 import logging
 import socket
+import threading
 import time
 from pathlib import Path
 from types import SimpleNamespace
-from typing import List
+from typing import Iterable, List, Optional
 
 import vpython
 
@@ -20,8 +21,10 @@ log = logging.getLogger()
 class ServerGui:
     UPDATES_PER_SECOND = 10
 
-    def __init__(self):
+    def __init__(self, commands_available: Optional[threading.Event] = None):
+        """commands_available will be set whenever there's user input."""
         self._commands: List[network.Request] = []
+        self.commands_available = commands_available or threading.Event()
         self._last_state: PhysicsState
         canvas = vpython.canvas(width=1, height=1)
 
@@ -57,7 +60,7 @@ class ServerGui:
         vpython_widgets.Input(
             bind=self._load_hook, placeholder='Load savefile')
         vpython_widgets.Input(
-            bind=self._load_hook, placeholder='Save savefile')
+            bind=self._save_hook, placeholder='Save savefile')
         vpython_widgets.stuff_widgets_into_flex_box([
             vpython_widgets.last_div_id - 1, vpython_widgets.last_div_id
         ])
@@ -73,19 +76,54 @@ document.querySelector(
 </script>""")
         self._last_contact_wtexts: List[vpython.wtext] = []
         self._previous_number_of_clients: int = 0
+        self._frame_timer = common.FrameTimer(self.UPDATES_PER_SECOND)
 
         # This is needed to launch vpython.
         vpython.sphere()
         canvas.delete()
         common.remove_vpython_css()
 
+        # update() hands off clients to draw through this single-slot mailbox,
+        # so that drawing happens in the render thread and never blocks the
+        # main loop. Only the latest clients are drawn.
+        self._render_slot: Optional[List[SimpleNamespace]] = None
+        self._render_slot_filled = threading.Event()
+        self._render_thread = threading.Thread(
+            target=self._render_target,
+            name='server gui render',
+            daemon=True
+        )
+        self._render_thread.start()
+
     def pop_commands(self) -> List[network.Request]:
         """Take gathered user input and send it off."""
         old_commands = self._commands
         self._commands = []
         return old_commands
 
-    def update(self, state: PhysicsState, clients: List[SimpleNamespace]):
+    def update(self, state: PhysicsState, clients: Iterable[SimpleNamespace]):
+        """Queues up drawing of the GUI. Doesn't block."""
+        # Keep this around in case the user wants to save it.
+        self._last_state = state
+        # Copy clients, since the caller might change them while we draw.
+        self._render_slot = list(clients)
+        self._render_slot_filled.set()
+
+    def _render_target(self):
+        """Draws the latest clients. Runs in the render thread."""
+        while True:
+            self._render_slot_filled.wait()
+            self._render_slot_filled.clear()
+            clients = self._render_slot
+            try:
+                if clients is not None:
+                    self._draw(clients)
+            except Exception:
+                # Keep drawing future updates, instead of silently stopping.
+                log.exception('Caught exception while drawing server GUI')
+            self._frame_timer.wait()
+
+    def _draw(self, clients: List[SimpleNamespace]):
         if len(clients) != self._previous_number_of_clients:
             # We only want to change the DOM when there is a change in clients,
             # which we notice when the cached list of unique client identifiers
@@ -99,8 +137,6 @@ document.querySelector(
 
             wtext.text = f'{relative_last_message_time:.1f} seconds ago'
 
-        vpython.rate(self.UPDATES_PER_SECOND)
-
     def _build_clients_table(self, clients: List[SimpleNamespace]):
         text = "<table>"
         text += "<caption>Connected OrbitX clients</caption>"
@@ -141,6 +177,7 @@ document.querySelector(
         if full_path.is_file():
             self._commands.append(network.Request(
                 ident=network.Request.LOAD_SAVEFILE, loadfile=textbox.text))
+            self.commands_available.set()
             textbox.text = f'Loaded {full_path}!'
         else:
             log.warning(f'Ignored non-existent loadfile: {full_path}')
@@ -5,7 +5,7 @@ import threading
 import time
 import queue
 from types import SimpleNamespace
-from typing import Dict, List, Optional, Iterable
+from typing import Dict, List, Optional, Iterable, Iterator, Tuple
 
 import grpc
 
@@ -18,6 +18,15 @@ log = logging.getLogger()
 
 DEFAULT_PORT = 28430
 
+# How many clients we expect to be streaming state at the same time. Each
+# streaming client (e.g. MC Flight) holds onto a GRPC worker thread for as long
+# as it's connected, so size GRPC thread pools with this in mind.
+MAX_STREAMING_CLIENTS = 3
+
+# Clients making unary requests (e.g. Habitat Flight and the Compatibility
+# Client) only need a GRPC worker thread for a short time.
+MAX_UNARY_CLIENTS = 2
+
 # This Request class is just an alias of the Command protobuf message. We
 # provide this so that nobody has to directly import orbitx_pb2, and so that
 # we can this wrapper class in the future.
@@ -37,6 +46,10 @@ class StateServer(grpc_stubs.StateServerServicer):
     Make sure to call self.notify_state_change when there's a physical state
     change, e.g. when a physics step is simulated.
 
+    Register this servicer with self.add_to_server instead of the generated
+    orbitx_pb2_grpc.add_StateServerServicer_to_server, since we send already
+    serialized PhysicalState bytes over the network.
+
     Magic!
     """
 
@@ -48,29 +61,104 @@ class StateServer(grpc_stubs.StateServerServicer):
         'OrbitV Compatibility Server'
     ]
 
-    def __init__(self):
-        self._class_used_properly = False
+    def __init__(self, commands_available: Optional[threading.Event] = None):
+        """commands_available will be set whenever a client sends a command.
+        Useful to wait for commands instead of polling self.pop_commands."""
         self._internal_state_lock = threading.Lock()
-        self._commands = queue.Queue()
+        self._commands: 'queue.Queue[protos.Command]' = queue.Queue()
+        self.commands_available = commands_available or threading.Event()
         self.addr_to_connected_clients: Dict[str, SimpleNamespace] = {}
 
-    def notify_state_change(self, physical_state_copy: protos.PhysicalState):
-        # This flag is to make sure this class is set up and being used
-        # properly. When changing this code, consider that multithreading is
-        # hard. This StateServer will be in a different thread than the main
-        # thread of whatever is using this GRPC server.
-        # So REMEMBER: the argument should not be modified by the main thread!
-        with self._internal_state_lock:
-            self._internal_state_copy = physical_state_copy
-            self._class_used_properly = True
+        # A single-slot mailbox between notify_state_change and the publisher
+        # thread. Only the latest state is kept, older states are dropped.
+        self._latest_state: Optional[PhysicsState] = None
+        self._latest_state_available = threading.Event()
+        # Set once there is a serialized state that we can send to clients.
+        self._state_published = threading.Event()
+        # Notified every time a new state is serialized, for streaming RPCs.
+        self._state_published_cond = threading.Condition(
+            self._internal_state_lock)
+        self._publish_count = 0
+        # Protected by self._internal_state_lock.
+        self._streaming_client_count = 0
+        self._serialized_state = b''
+        # Only used by the publisher thread, reused for every state.
+        self._proto_buffer = protos.PhysicalState()
+        self._publisher_thread = threading.Thread(
+            target=self._publisher_target,
+            name='state publisher',
+            daemon=True
+        )
+        self._publisher_thread.start()
+
+    def add_to_server(self, server: grpc.Server):
+        """Registers this servicer with a GRPC server.
+
+        This does the same as the generated add_StateServerServicer_to_server,
+        except that responses aren't serialized by GRPC. get_physical_state
+        returns bytes that were serialized once by the publisher thread, so
+        that every client gets the same bytes without re-serialization."""
+        rpc_method_handlers = {
+            'get_physical_state': grpc.stream_unary_rpc_method_handler(
+                self.get_physical_state,
+                request_deserializer=protos.Command.FromString,
+                # No serializer, GRPC will send our bytes as-is.
+                response_serializer=None,
+            ),
+            'stream_physical_state': grpc.unary_stream_rpc_method_handler(
+                self.stream_physical_state,
+                request_deserializer=protos.Command.FromString,
+                response_serializer=None,
+            ),
+        }
+        generic_handler = grpc.method_handlers_generic_handler(
+            'StateServer', rpc_method_handlers)
+        server.add_generic_rpc_handlers((generic_handler,))
+
+    def notify_state_change(self, physics_state: PhysicsState):
+        """Hands off the latest state, to be sent to clients.
+
+        This is cheap, since serialization is done by the publisher thread.
+        REMEMBER: the argument should not be modified after this is called!"""
+        # When changing this code, consider that multithreading is hard. The
+        # publisher thread and the GRPC server threads will be different
+        # from the main thread of whatever is calling this method.
+        self._latest_state = physics_state
+        self._latest_state_available.set()
+
+    def _publisher_target(self):
+        """Serializes the latest state. Runs in the publisher thread."""
+        while True:
+            self._latest_state_available.wait()
+            self._latest_state_available.clear()
+            # If notify_state_change is called after we clear the event, the
+            # event will be set again and we'll serialize the newer state.
+            physics_state = self._latest_state
+            if physics_state is not None:
+                self._publish(physics_state)
+
+    def _publish(self, physics_state: PhysicsState):
+        """Serializes a state for clients. Called by the publisher thread."""
+        physics_state.copy_into_proto(self._proto_buffer)
+        serialized_state = self._proto_buffer.SerializeToString()
+        with self._state_published_cond:
+            # If the state hasn't changed, e.g. when the simulation is paused,
+            # don't resend the same bytes to streaming clients.
+            if serialized_state != self._serialized_state:
+                self._serialized_state = serialized_state
+                self._publish_count += 1
+                self._state_published_cond.notify_all()
+        self._state_published.set()
 
     def get_physical_state(
         self, request_iterator: Iterable[protos.Command], context) \
-            -> protos.PhysicalState:
+            -> bytes:
         """Server-side implementation of this remote procedure call (RPC).
 
         This is called by GRPC, and the name of the function is special (it's
-        referenced in orbitx.proto, under service StateServer)"""
+        referenced in orbitx.proto, under service StateServer)
+
+        Returns a serialized protos.PhysicalState, see self.add_to_server."""
         client_type: Optional[protos.Command.ClientType] = None
         for request in request_iterator:
             if client_type is None:
@@ -80,21 +168,78 @@ class StateServer(grpc_stubs.StateServerServicer):
 
             if request.ident != protos.Command.NOOP:
                 self._commands.put(request)
+                self.commands_available.set()
         assert client_type is not None
+        self._record_client_contact(client_type, context.peer())
 
-        if context.peer() not in self.addr_to_connected_clients:
-            self.addr_to_connected_clients[context.peer()] = \
-                SimpleNamespace(
-                    client_type=self.CLIENT_TYPE_TO_STR[client_type],
-                    client_addr=context.peer()
-                )
+        # This is to make sure this class is set up and being used properly,
+        # i.e. that notify_state_change has been called at least once.
+        published = self._state_published.wait(timeout=5)
+        assert published, 'notify_state_change was never called'
+        with self._internal_state_lock:
+            return self._serialized_state
+
+    def stream_physical_state(
+            self, request: protos.Command, context) -> Iterator[bytes]:
+        """Server-side implementation of a server-streaming RPC.
 
-        self.addr_to_connected_clients[context.peer()].last_contact = \
-            time.monotonic()
+        Like get_physical_state, this is called by GRPC. Instead of returning
+        one state, this yields every newly-published state until the client
+        disconnects. Yields serialized protos.PhysicalState."""
+        published = self._state_published.wait(timeout=5)
+        assert published, 'notify_state_change was never called'
 
         with self._internal_state_lock:
-            assert self._class_used_properly
-            return self._internal_state_copy
+            too_many_streams = \
+                self._streaming_client_count >= MAX_STREAMING_CLIENTS
+            if not too_many_streams:
+                self._streaming_client_count += 1
+        if too_many_streams:
+            # Each stream holds a GRPC worker thread, don't let streams take
+            # up the workers that other clients need.
+            context.abort(
+                grpc.StatusCode.RESOURCE_EXHAUSTED,
+                f'at most {MAX_STREAMING_CLIENTS} clients can stream state '
+                'from this physics server at once')
+
+        try:
+            yield from self._stream_published_states(request, context)
+        finally:
+            with self._internal_state_lock:
+                self._streaming_client_count -= 1
+
+    def _stream_published_states(
+            self, request: protos.Command, context) -> Iterator[bytes]:
+        client_type: protos.Command.ClientType = request.client
+        last_publish_count = 0
+        while context.is_active():
+            # Even if the state hasn't changed, we're still connected.
+            self._record_client_contact(client_type, context.peer())
+            with self._state_published_cond:
+                # Time out occasionally to check if the client is still there.
+                self._state_published_cond.wait_for(
+                    lambda: self._publish_count != last_publish_count,
+                    timeout=1)
+                if self._publish_count == last_publish_count:
+                    continue
+                last_publish_count = self._publish_count
+                serialized_state = self._serialized_state
+
+            yield serialized_state
+
+    def _record_client_contact(
+            self, client_type: protos.Command.ClientType, peer: str):
+        # refresh_client_list and other threads might change the dict at any
+        # time, so only access it once, and never add a partly-built client.
+        client = self.addr_to_connected_clients.get(peer)
+        if client is None:
+            self.addr_to_connected_clients[peer] = SimpleNamespace(
+                client_type=self.CLIENT_TYPE_TO_STR[client_type],
+                client_addr=peer,
+                last_contact=time.monotonic()
+            )
+        else:
+            client.last_contact = time.monotonic()
 
     def pop_commands(self) -> List[protos.Command]:
         """Returns all commands that have been sent to this server.
@@ -120,6 +265,17 @@ class StateClient:
         connection = StateClient('localhost')
         while True:
             physics_state = connection.get_state()
+
+    Or, to receive state updates in the background as soon as they happen:
+        connection = StateClient('localhost')
+        connection.start_streaming()
+        applied_sequence = 0
+        while True:
+            sequence, physics_state = \
+                connection.latest_streamed_state(applied_sequence)
+            if physics_state is not None:
+                applied_sequence = sequence
+                ...
     """
 
     def __init__(self, client: protos.Command.ClientType, hostname: str):
@@ -128,6 +284,64 @@ class StateClient:
         self.stub = grpc_stubs.StateServerStub(self.channel)
         self.client_type = client
 
+        self._streaming_thread: Optional[threading.Thread] = None
+        # The latest streamed state, and how many states have been streamed.
+        # This is a tuple so that both are updated in one atomic assignment.
+        self._streamed_state: Tuple[int, Optional[protos.PhysicalState]] = \
+            (0, None)
+        # Set once the stream ends, e.g. if the physics server already has
+        # MAX_STREAMING_CLIENTS. After that, we poll for state instead.
+        self._streaming_stopped = False
+
+    def start_streaming(self):
+        """Starts receiving state updates in a background thread.
+
+        Call latest_streamed_state to get the latest received state."""
+        assert self._streaming_thread is None
+        self._streaming_thread = threading.Thread(
+            target=self._streaming_target,
+            name='state streaming',
+            daemon=True
+        )
+        self._streaming_thread.start()
+
+    def _streaming_target(self):
+        try:
+            sequence = 0
+            for proto_state in self.stub.stream_physical_state(
+                    Request(ident=Request.NOOP, client=self.client_type)):
+                sequence += 1
+                # Python reference assignment is atomic, so this is safe.
+                self._streamed_state = (sequence, proto_state)
+        except grpc.RpcError as err:
+            log.warning(
+                f'State streaming stopped: {err.code()} {err.details()}. '
+                'Polling the physics server for state instead.')
+        self._streaming_stopped = True
+
+    def latest_streamed_state(self, newer_than: int = 0) \
+            -> Tuple[int, Optional[PhysicsState]]:
+        """Returns the sequence number of the latest streamed state, and the
+        state itself if its sequence number is greater than newer_than.
+
+        Sequence numbers start at 1, so newer_than=0 returns the latest state
+        if any state has been streamed at all. The latest state is always
+        kept, so it can be returned again.
+        This doesn't block while streaming. If the stream has stopped, this
+        polls the physics server like get_state does, and every polled state
+        gets a new sequence number."""
+        sequence, proto_state = self._streamed_state
+        if self._streaming_stopped:
+            # The streaming thread is done, so we're the only one updating
+            # self._streamed_state now.
+            proto_state = self.stub.get_physical_state(iter([
+                Request(ident=Request.NOOP, client=self.client_type)]))
+            sequence += 1
+            self._streamed_state = (sequence, proto_state)
+        if proto_state is None or sequence <= newer_than:
+            return sequence, None
+        return sequence, PhysicsState(None, proto_state)
+
     def get_state(self, commands: List[Request] = None) \
             -> PhysicsState:
 
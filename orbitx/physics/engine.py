@@ -17,7 +17,8 @@ import logging
 import threading
 import time
 import warnings
-from typing import Callable, List, Optional, Tuple, NamedTuple, Union
+from typing import Callable, Iterable, List, Optional, Tuple, NamedTuple, \
+    Union
 
 import numpy as np
 import scipy.integrate
@@ -56,7 +57,7 @@ class PhysicsEngine:
     Example usage:
     pe = PhysicsEngine(flight_savefile)
     state = pe.get_state()
-    pe.handle_request(Request(ident=..., ...))  # Change some state.
+    state = pe.handle_requests([Request(ident=..., ...)])  # Change state.
     # Simulates 20 seconds:
     state = pe.get_state(requested_t=20)
 
@@ -173,12 +174,21 @@ class PhysicsEngine:
         # Fork self._simthread into the background.
         self._simthread.start()
 
-    def handle_requests(self, requests: List[Request], requested_t=None):
+    def handle_requests(self, requests: Iterable[Request], requested_t=None) \
+            -> PhysicsState:
+        """Changes the simulation state according to each request.
+
+        Returns the physical state of the simulation right after the requests
+        were handled, so callers don't have to call get_state again.
+        All requests are applied at once, and the simthread is restarted only
+        once. NOOP requests are ignored, and won't restart the simthread."""
         requested_t = self._simtime(requested_t)
+        requests = [
+            request for request in requests if request.ident != Request.NOOP]
         if len(requests) == 0:
-            return
+            return self.get_state(requested_t)
 
-        if len(requests) and requests[0].ident == Request.TIME_ACC_SET:
+        if requests[0].ident == Request.TIME_ACC_SET:
             # Immediately change the time acceleration, don't wait for the
             # simulation to catch up. This deals with the case where we're at
             # 100,000x time acc, and the program seems frozen for the user and
@@ -196,9 +206,6 @@ class PhysicsEngine:
             y0 = self.get_state(requested_t)
 
         for request in requests:
-            if request.ident == Request.NOOP:
-                # We don't care about these requests
-                continue
             y0 = _one_request(request, y0)
             if request.ident == Request.TIME_ACC_SET:
                 assert request.time_acc_set >= 0
@@ -208,6 +215,8 @@ class PhysicsEngine:
                 )
 
         self.set_state(y0)
+        # The simthread is now simulating from y0, give the caller a copy.
+        return PhysicsState(y0.y0(), y0._proto_state)
 
     def set_state(self, physical_state: PhysicsState):
         self._stop_simthread()
@@ -807,8 +816,10 @@ def _one_request(request: Request, y0: PhysicsState) \
 
     Use an argument to change habitat throttle or spinning, and simulation
     will restart with this new information."""
-    log.info(f'At simtime={y0.timestamp}, '
-             f'Got command {MessageToString(request, as_one_line=True)}')
+    # Formatting a protobuf as text is slow, only do it if it will be logged.
+    if log.isEnabledFor(logging.INFO):
+        log.info(f'At simtime={y0.timestamp}, '
+                 f'Got command {MessageToString(request, as_one_line=True)}')
 
     if request.ident != Request.TIME_ACC_SET:
         # Reveal the type of y0.craft as str (not None).
@@ -1,8 +1,6 @@
 import argparse
 import atexit
 import logging
-import os
-from pathlib import Path
 
 from orbitx import common
 from orbitx import physics
@@ -23,7 +21,8 @@ argument_parser = argparse.ArgumentParser(
     'flighttraining',
     description=description.replace('<br />', '\n'))
 argument_parser.add_argument(
-    'loadfile', type=str, nargs='?', default='OCESS.json',
+    'loadfile', type=common.savefile_argument, nargs='?',
+    default='OCESS.json',
     help=(
         f'Name of the savefile to load, relative to {common.savefile(".")}. '
         'Should be a .json savefile written by OrbitX. '
@@ -32,14 +31,9 @@ argument_parser.add_argument(
 
 
 def main(args: argparse.Namespace):
-    loadfile: Path
-    if os.path.isabs(args.loadfile):
-        loadfile = Path(args.loadfile)
-    else:
-        # Take paths relative to 'data/saves/'
-        loadfile = common.savefile(args.loadfile)
-
-    physics_engine = physics.PhysicsEngine(common.load_savefile(loadfile))
+    # args.loadfile is already resolved, see common.savefile_argument.
+    physics_engine = physics.PhysicsEngine(
+        common.load_savefile(args.loadfile))
     initial_state = physics_engine.get_state()
 
     gui = flight_gui.FlightGui(
@@ -52,11 +46,10 @@ def main(args: argparse.Namespace):
         common.start_profiling()
 
     while True:
-        state = physics_engine.get_state()
-
         # If we have any commands, process them so the simthread has as
-        # much time as possible to restart before next update.
-        physics_engine.handle_requests(gui.pop_commands())
+        # much time as possible to restart before next update. This also gets
+        # the state after the commands have been handled, so we draw that.
+        state = physics_engine.handle_requests(gui.pop_commands())
 
         gui.draw(state)
         gui.rate(common.FRAMERATE)
@@ -33,16 +33,33 @@ argument_parser.add_argument(
 def main(args: argparse.Namespace):
     time_of_last_network_update = 0.0
     networking = True  # Whether data is requested over the network
+    # The sequence number of the last streamed state we took.
+    applied_sequence = 0
+    # Whether we should resync with the physics server as soon as possible.
+    resync = False
 
     log.info(f'Connecting to physics server {args.physics_server}.')
     lead_server_connection = network.StateClient(
         Request.MC_FLIGHT, args.physics_server)
     state = lead_server_connection.get_state()
     physics_engine = physics.PhysicsEngine(state)
+    # Receive state updates in the background, so we usually don't wait on
+    # the network in this main loop. If the physics server can't stream to
+    # us, latest_streamed_state polls the server instead.
+    lead_server_connection.start_streaming()
 
     gui = flight_gui.FlightGui(state, title=name, running_as_mirror=True)
     atexit.register(gui.shutdown)
 
+    # Look up these functions and constants once, instead of every frame.
+    monotonic = time.monotonic
+    network_update_period = common.TIME_BETWEEN_NETWORK_UPDATES
+    framerate = common.FRAMERATE
+    latest_streamed_state = lead_server_connection.latest_streamed_state
+    get_state = physics_engine.get_state
+    handle_requests = physics_engine.handle_requests
+    pop_commands = gui.pop_commands
+
     while True:
         old_networking = networking
         networking = gui.requesting_read_from_physics_server()
@@ -51,23 +68,40 @@ def main(args: argparse.Namespace):
                 ('STARTED' if networking else 'STOPPED') +
                 ' networking with the physics server at ' +
                 args.physics_server)
+            # Our state might have diverged from the physics server while we
+            # weren't networking, even if the server's state hasn't changed.
+            resync = networking
 
-        if (networking and
-            time.monotonic() - time_of_last_network_update >
-                common.TIME_BETWEEN_NETWORK_UPDATES):
-            # Our state is stale, get the latest update
+        streamed_state = None
+        if networking and (
+            resync or
+            monotonic() - time_of_last_network_update >
+                network_update_period):
+            # Our state is stale, take the latest state streamed to us. We
+            # don't do this for every streamed state, since set_state restarts
+            # the simthread.
             # TODO: what if this fails? Set networking to False?
-            state = lead_server_connection.get_state()
+            sequence, streamed_state = latest_streamed_state(
+                0 if resync else applied_sequence)
+            if resync and streamed_state is None:
+                # Nothing has been streamed to us yet, ask directly.
+                streamed_state = lead_server_connection.get_state()
+            else:
+                applied_sequence = sequence
+            resync = False
+
+        if streamed_state is not None:
+            state = streamed_state
             physics_engine.set_state(state)
-            time_of_last_network_update = time.monotonic()
+            time_of_last_network_update = monotonic()
+        elif networking:
+            state = get_state()
         else:
-            state = physics_engine.get_state()
+            # When we're not networking, allow user input.
+            state = handle_requests(pop_commands())
 
         gui.draw(state)
-        if not networking:
-            # When we're not networking, allow user input.
-            physics_engine.handle_requests(gui.pop_commands())
-        gui.rate(common.FRAMERATE)
+        gui.rate(framerate)
 
 
 program = programs.Program(
@@ -2,8 +2,7 @@ import argparse
 import concurrent.futures
 import atexit
 import logging
-import os
-from pathlib import Path
+import threading
 
 import grpc
 
@@ -12,7 +11,6 @@ from orbitx import network
 from orbitx import physics
 from orbitx import programs
 from orbitx.graphics.server_gui import ServerGui
-import orbitx.orbitx_pb2_grpc as grpc_stubs
 
 log = logging.getLogger()
 
@@ -32,7 +30,8 @@ argument_parser = argparse.ArgumentParser(
     'physicsserver',
     description=description.replace('<br />', '\n'))
 argument_parser.add_argument(
-    'loadfile', type=str, nargs='?', default='OCESS.json',
+    'loadfile', type=common.savefile_argument, nargs='?',
+    default='OCESS.json',
     help=(
         f'Name of the savefile to load, relative to {common.savefile(".")}. '
         'Should be a .json savefile written by OrbitX. '
@@ -43,30 +42,35 @@ argument_parser.add_argument(
 def main(args: argparse.Namespace):
     # Before you make changes to this function, keep in mind that this function
     # starts a GRPC server that runs in a separate thread!
-    state_server = network.StateServer()
-
-    loadfile: Path
-    if os.path.isabs(args.loadfile):
-        loadfile = Path(args.loadfile)
-    else:
-        # Take paths relative to 'data/saves/'
-        loadfile = common.savefile(args.loadfile)
-
-    physics_engine = physics.PhysicsEngine(common.load_savefile(loadfile))
+    # Both the StateServer and the GUI will wake up our main loop with this
+    # when they get a command, so that we can handle it immediately.
+    commands_available = threading.Event()
+    state_server = network.StateServer(commands_available)
+
+    # args.loadfile is already resolved, see common.savefile_argument.
+    physics_engine = physics.PhysicsEngine(
+        common.load_savefile(args.loadfile))
     initial_state = physics_engine.get_state()
 
+    TICKS_PER_SECOND = 10
     TICKS_BETWEEN_CLIENT_LIST_REFRESHES = 150
     ticks_until_next_client_list_refresh = 0
 
+    # Enough workers for every client to have one at the same time. Any more
+    # would just contend for the thread pool's shared work queue. StateServer
+    # rejects streams beyond MAX_STREAMING_CLIENTS, so that streams can't
+    # take up the workers that unary RPCs need.
+    grpc_workers = network.MAX_STREAMING_CLIENTS + network.MAX_UNARY_CLIENTS
     server = grpc.server(
-        concurrent.futures.ThreadPoolExecutor(max_workers=4))
+        concurrent.futures.ThreadPoolExecutor(
+            max_workers=grpc_workers, thread_name_prefix='grpc'))
     atexit.register(lambda: server.stop(grace=2))
-    grpc_stubs.add_StateServerServicer_to_server(state_server, server)
+    state_server.add_to_server(server)
     server.add_insecure_port(f'[::]:{network.DEFAULT_PORT}')
-    state_server.notify_state_change(initial_state.as_proto())
+    state_server.notify_state_change(initial_state)
     server.start()  # This doesn't block!
 
-    gui = ServerGui()
+    gui = ServerGui(commands_available)
 
     try:
         if args.flamegraph:
@@ -74,14 +78,24 @@ def main(args: argparse.Namespace):
         if args.profile:
             common.start_profiling()
 
+        # Look up these methods once, instead of every tick of the main loop.
+        pop_server_commands = state_server.pop_commands
+        pop_gui_commands = gui.pop_commands
+        handle_requests = physics_engine.handle_requests
+        notify_state_change = state_server.notify_state_change
+        connected_clients = state_server.addr_to_connected_clients
+        gui_update = gui.update
+        # The GUI draws in its own thread, so we pace ourselves. We also run
+        # an extra tick as soon as there is a command to handle.
+        frame_timer = common.FrameTimer(TICKS_PER_SECOND)
+
         while True:
             # If we have any commands, process them immediately so input lag
             # is minimized.
-            commands = state_server.pop_commands() + gui.pop_commands()
-            physics_engine.handle_requests(commands)
-
-            state = physics_engine.get_state()
-            state_server.notify_state_change(state.as_proto())
+            commands = pop_server_commands() + pop_gui_commands()
+            # This also gets the state after the commands have been handled.
+            state = handle_requests(commands)
+            notify_state_change(state)
 
             if ticks_until_next_client_list_refresh == 0:
                 ticks_until_next_client_list_refresh = \
@@ -89,7 +103,8 @@ def main(args: argparse.Namespace):
                 state_server.refresh_client_list()
             ticks_until_next_client_list_refresh -= 1
 
-            gui.update(state, state_server.addr_to_connected_clients.values())
+            gui_update(state, connected_clients.values())
+            frame_timer.wait(wake_event=commands_available)
     finally:
         server.stop(grace=1)
 
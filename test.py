@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 import logging
+import shutil
 import sys
+import tempfile
+import threading
+import time
 import unittest
+from pathlib import Path
 
+import grpc
 import numpy as np
 
 import orbitx.orbitx_pb2 as protos
@@ -16,6 +22,19 @@ from orbitx.data_structures import _EntityView, Entity, PhysicsState
 
 log = logging.getLogger()
 
+_savefile_cache_dir: tempfile.TemporaryDirectory
+
+
+def setUpModule():
+    # Don't write savefile caches into the repository while testing.
+    global _savefile_cache_dir
+    _savefile_cache_dir = tempfile.TemporaryDirectory()
+    common.SAVEFILE_CACHE_DIR = Path(_savefile_cache_dir.name)
+
+
+def tearDownModule():
+    _savefile_cache_dir.cleanup()
+
 
 class PhysicsEngine:
     """Ensures that the simthread is always shut down on test exit/failure."""
@@ -145,6 +164,29 @@ class PhysicsEngineTestCase(unittest.TestCase):
             self.assertEqual(round(after_empty_fuel[0].vx),
                              round(empty_fuel[0].vx))
 
+    def test_handle_requests_returns_state(self):
+        """Test that handle_requests returns the state after the requests."""
+        with PhysicsEngine('tests/habitat.json') as physics_engine:
+            handled = physics_engine.handle_requests([
+                network.Request(
+                    ident=network.Request.HAB_THROTTLE_SET,
+                    throttle_set=1)],
+                requested_t=0)
+            self.assertAlmostEqual(handled[0].throttle, 1)
+
+            no_requests = physics_engine.handle_requests([], requested_t=5)
+            self.assertAlmostEqual(no_requests.timestamp, 5)
+            self.assertAlmostEqual(no_requests[0].throttle, 1)
+
+    def test_noop_requests_ignored(self):
+        """Test that NOOP requests don't restart the simthread."""
+        with PhysicsEngine('tests/habitat.json') as physics_engine:
+            simthread = physics_engine._simthread
+            physics_engine.handle_requests(
+                [network.Request(ident=network.Request.NOOP)] * 3,
+                requested_t=0)
+            self.assertIs(physics_engine._simthread, simthread)
+
     def test_srbs(self):
         """Test that SRBs move the craft, and run out of fuel."""
         with PhysicsEngine('tests/habitat.json') as physics_engine:
@@ -352,6 +394,18 @@ class PhysicsStateTestCase(unittest.TestCase):
         self.assertEqual(proto_state.entities[0].fuel, 90)
         self.assertTrue(proto_state.entities[1].broken)
 
+    def test_copy_into_proto(self):
+        """Test that copy_into_proto overwrites an existing proto."""
+        ps = PhysicsState(None, self.proto_state)
+        entity = ps[0]
+        entity.x = 500
+
+        reused_proto = protos.PhysicalState(
+            timestamp=1, entities=[protos.Entity(name='Stale')])
+        ps.copy_into_proto(reused_proto)
+        self.assertEqual(reused_proto, ps.as_proto())
+        self.assertEqual(reused_proto.entities[0].x, 500)
+
     def test_get_set(self):
         """Test __getitem__ and __setitem__."""
         ps = PhysicsState(None, self.proto_state)
@@ -388,6 +442,159 @@ class PhysicsStateTestCase(unittest.TestCase):
         self.assertEqual(ps['First'].y, 66)
 
 
+class FakeRpcError(grpc.RpcError):
+    def __init__(self, code: grpc.StatusCode, details: str):
+        self._code = code
+        self._details = details
+
+    def code(self) -> grpc.StatusCode:
+        return self._code
+
+    def details(self) -> str:
+        return self._details
+
+
+class FakeServicerContext:
+    """Stands in for the context that GRPC passes to servicer methods."""
+
+    def __init__(self):
+        self.active = True
+
+    def is_active(self) -> bool:
+        return self.active
+
+    def peer(self) -> str:
+        return 'ipv4:127.0.0.1:12345'
+
+    def abort(self, code: grpc.StatusCode, details: str):
+        raise FakeRpcError(code, details)
+
+
+class FakeStateServerStub:
+    """Calls a StateServer directly, instead of over the network."""
+
+    def __init__(self, state_server: network.StateServer):
+        self.state_server = state_server
+
+    def get_physical_state(self, request_iterator):
+        return protos.PhysicalState.FromString(
+            self.state_server.get_physical_state(
+                request_iterator, FakeServicerContext()))
+
+    def stream_physical_state(self, request):
+        for serialized_state in self.state_server.stream_physical_state(
+                request, FakeServicerContext()):
+            yield protos.PhysicalState.FromString(serialized_state)
+
+
+class StateServerTestCase(unittest.TestCase):
+    """Tests network.StateServer publishing, without any networking."""
+
+    state = PhysicsState(None, PhysicsStateTestCase.proto_state)
+    changed_state = PhysicsState(
+        None, protos.PhysicalState(
+            timestamp=6, entities=PhysicsStateTestCase.proto_state.entities))
+    stream_request = network.Request(
+        ident=network.Request.NOOP, client=network.Request.MC_FLIGHT)
+
+    def test_notify_state_change(self):
+        """Test that the publisher thread serializes the latest state."""
+        state_server = network.StateServer()
+        state_server.notify_state_change(self.state)
+        state_server.notify_state_change(self.changed_state)
+
+        expected = self.changed_state.as_proto().SerializeToString()
+        deadline = time.monotonic() + 5
+        while (state_server._serialized_state != expected and
+                time.monotonic() < deadline):
+            time.sleep(0.01)
+        self.assertEqual(state_server._serialized_state, expected)
+        self.assertTrue(state_server._state_published.is_set())
+
+    def test_unchanged_state_not_republished(self):
+        """Test that publishing the same state twice only counts once."""
+        state_server = network.StateServer()
+        state_server._publish(self.state)
+        self.assertEqual(state_server._publish_count, 1)
+        state_server._publish(self.state)
+        self.assertEqual(state_server._publish_count, 1)
+        state_server._publish(self.changed_state)
+        self.assertEqual(state_server._publish_count, 2)
+
+    def test_stream_physical_state(self):
+        """Test that streams yield each new state, until disconnected."""
+        state_server = network.StateServer()
+        context = FakeServicerContext()
+        state_server._publish(self.state)
+
+        stream = state_server.stream_physical_state(
+            self.stream_request, context)
+        self.assertEqual(
+            next(stream), self.state.as_proto().SerializeToString())
+        self.assertIn(context.peer(), state_server.addr_to_connected_clients)
+
+        state_server._publish(self.changed_state)
+        self.assertEqual(
+            next(stream), self.changed_state.as_proto().SerializeToString())
+
+        # Nothing new is published, and the client disconnects.
+        state_server._publish(self.changed_state)
+        context.active = False
+        with self.assertRaises(StopIteration):
+            next(stream)
+
+    def test_streaming_client_limit(self):
+        """Test that streams beyond MAX_STREAMING_CLIENTS are rejected."""
+        state_server = network.StateServer()
+        state_server._publish(self.state)
+
+        streams = []
+        for _ in range(network.MAX_STREAMING_CLIENTS):
+            stream = state_server.stream_physical_state(
+                self.stream_request, FakeServicerContext())
+            next(stream)
+            streams.append(stream)
+
+        with self.assertRaises(FakeRpcError) as cm:
+            next(state_server.stream_physical_state(
+                self.stream_request, FakeServicerContext()))
+        self.assertEqual(
+            cm.exception.code(), grpc.StatusCode.RESOURCE_EXHAUSTED)
+
+        # Once a stream ends, there's room for another.
+        streams.pop().close()
+        next(state_server.stream_physical_state(
+            self.stream_request, FakeServicerContext()))
+
+    def test_over_limit_client_gets_state(self):
+        """Test that a client that can't stream polls for state instead."""
+        state_server = network.StateServer()
+        state_server._publish(self.state)
+
+        streams = []
+        for _ in range(network.MAX_STREAMING_CLIENTS):
+            stream = state_server.stream_physical_state(
+                self.stream_request, FakeServicerContext())
+            next(stream)
+            streams.append(stream)
+
+        client = network.StateClient(network.Request.MC_FLIGHT, 'localhost')
+        client.stub = FakeStateServerStub(state_server)
+        client.start_streaming()
+        client._streaming_thread.join(timeout=5)
+        self.assertFalse(client._streaming_thread.is_alive())
+
+        sequence, physics_state = client.latest_streamed_state()
+        self.assertIsNotNone(physics_state)
+        self.assertEqual(physics_state.timestamp, self.state.timestamp)
+
+        state_server._publish(self.changed_state)
+        sequence, physics_state = client.latest_streamed_state(sequence)
+        self.assertIsNotNone(physics_state)
+        self.assertEqual(
+            physics_state.timestamp, self.changed_state.timestamp)
+
+
 class CalculationsTestCase(unittest.TestCase):
     """Tests instantaneous orbit parameter calculations.
 
@@ -460,6 +667,67 @@ class CalculationsTestCase(unittest.TestCase):
         self.assertAlmostEqual(calc.v_speed(iss, earth), -0.1, delta=0.1)
 
 
+class SavefileTestCase(unittest.TestCase):
+    """Tests loading and caching of savefiles."""
+
+    def test_savefile_cache(self):
+        """Test that cached savefiles are the same, and are invalidated."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            savefile = Path(tmpdir, 'only-sun.json')
+            shutil.copy(common.savefile('tests/only-sun.json'), savefile)
+
+            parsed = common.load_savefile(savefile)
+            cache = common._savefile_cache(savefile)
+            assert cache is not None
+            self.assertTrue(cache.is_file())
+            self.assertEqual(cache.parent, common.SAVEFILE_CACHE_DIR)
+            cached = common.load_savefile(savefile)
+            self.assertEqual(parsed.as_proto(), cached.as_proto())
+
+            # Changing the savefile should invalidate the cache, and replace
+            # it instead of adding another cache file.
+            cache_files = set(common.SAVEFILE_CACHE_DIR.iterdir())
+            parsed.timestamp = 1234
+            common.write_savefile(parsed, savefile)
+            self.assertEqual(common.load_savefile(savefile).timestamp, 1234)
+            self.assertEqual(
+                set(common.SAVEFILE_CACHE_DIR.iterdir()), cache_files)
+
+
+class FrameTimerTestCase(unittest.TestCase):
+    """Tests common.FrameTimer pacing."""
+
+    def test_work_counts_towards_frame(self):
+        """Test that time spent working doesn't add to frame time."""
+        frame_timer = common.FrameTimer(20)
+        start = time.monotonic()
+        for _ in range(10):
+            time.sleep(frame_timer.period / 2)  # Do half a frame of work.
+            frame_timer.wait()
+        self.assertAlmostEqual(
+            time.monotonic() - start, 10 * frame_timer.period, delta=0.05)
+
+    def test_slow_frame_does_not_burst(self):
+        """Test that falling behind doesn't cause catch-up frames."""
+        frame_timer = common.FrameTimer(20)
+        time.sleep(frame_timer.period * 3)
+        frame_timer.wait()  # This frame was late, this shouldn't sleep.
+        start = time.monotonic()
+        frame_timer.wait()
+        self.assertAlmostEqual(
+            time.monotonic() - start, frame_timer.period, delta=0.02)
+
+    def test_wake_event(self):
+        """Test that setting the wake event ends the wait early."""
+        frame_timer = common.FrameTimer(1)
+        wake_event = threading.Event()
+        threading.Timer(0.01, wake_event.set).start()
+        start = time.monotonic()
+        frame_timer.wait(wake_event=wake_event)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertFalse(wake_event.is_set())
+
+
 def test_performance():
     # This just runs for 10 seconds and collects profiling data.
     import time